@@ -3,52 +3,59 @@
 from __future__ import annotations
 
 import argparse
-import json
-import math
-from dataclasses import dataclass, field
+import functools
 from pathlib import Path
-from typing import Any, Iterable
-
-import matplotlib
-
-matplotlib.use("Agg")
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-from matplotlib.figure import Figure
+from typing import TYPE_CHECKING, Any
+
+if not __package__:  # python scripts/generate_diagram.py, where scripts/ is sys.path[0]
+    from mindmap_core import (
+        ROOT,
+        DrawingOutlineNode,
+        TextOutlineNode,
+        get_layout,
+        iter_nodes,
+        layout_tree,
+        load_tree,
+    )
+else:  # python -m scripts.generate_diagram
+    from .mindmap_core import (  # type: ignore[import-not-found, no-redef]
+        ROOT,
+        DrawingOutlineNode,
+        TextOutlineNode,
+        get_layout,
+        iter_nodes,
+        layout_tree,
+        load_tree,
+    )
 
-def _child_list_factory() -> list["OutlineNode"]:
-    return []
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
+# Matplotlib is imported inside draw_mind_map so markdown/ascii exports skip its
+# import cost entirely.
 
-ROOT = Path(__file__).resolve().parents[1]
-DATA_PATH = ROOT / "data" / "outline.json"
 OUTPUT_DIR = ROOT / "output"
 DEFAULT_PDF = OUTPUT_DIR / "secure-clinical-communication.pdf"
 DEFAULT_MD = OUTPUT_DIR / "secure-clinical-communication.md"
 DEFAULT_ASCII = OUTPUT_DIR / "WBS_diagram"
+FIGSIZE = (11, 11)
 
+CONNECTOR_COLOR = "#94a3b8"
 
-@dataclass
-class OutlineNode:
-    """Simple tree node that keeps drawing metadata."""
-
-    title: str
-    code: str | None = None
-    children: list["OutlineNode"] = field(default_factory=_child_list_factory)
-    parent: OutlineNode | None = None
-    depth: int = 0
-    angle: float = 0.0
-    radius: float = 0.0
+# Marker size, font size, node color, label color (None reuses the node color),
+# font weight, and marker alpha for depth 0, 1, 2, and 3+.
+_DEPTH_STYLE = (
+    (1400, 18, "#0b3954", "#ffffff", "bold", None),
+    (220, 13, "#087e8b", None, "bold", 0.95),
+    (90, 11, "#1f487e", None, "bold", 0.95),
+    (60, 10, "#475569", None, "normal", 0.95),
+)
 
-    @property
-    def label(self) -> str:
-        return f"{self.code} {self.title}" if self.code else self.title
+# A label is skipped when a shallower label covers more than this fraction of it.
+LABEL_OVERLAP_LIMIT = 0.9
 
-    @property
-    def coords(self) -> tuple[float, float]:
-        return (
-            self.radius * math.cos(self.angle),
-            self.radius * math.sin(self.angle),
-        )
+# Figures are reused across renders so repeated exports keep one Agg buffer.
+_FIG_CACHE: dict[tuple[float, float], Figure] = {}
 
 
 def parse_args() -> argparse.Namespace:
@@ -71,175 +78,227 @@ def parse_args() -> argparse.Namespace:
         default=300,
         help="Resolution used for the exported diagram.",
     )
+    parser.add_argument(
+        "--rasterize",
+        action="store_true",
+        help="Rasterize PDF markers and connectors at --dpi while keeping labels as vector text.",
+    )
     return parser.parse_args()
 
 
-def load_outline() -> dict[str, Any]:
-    with DATA_PATH.open("r", encoding="utf-8") as source:
-        return json.load(source)
-
-
-def build_tree(raw: dict[str, Any], depth: int = 0, parent: OutlineNode | None = None) -> OutlineNode:
-    node = OutlineNode(title=raw["title"], code=raw.get("code"), parent=parent, depth=depth)
-    node.children = [build_tree(child, depth + 1, node) for child in raw.get("children", [])]
-    return node
-
-
-def layout_tree(root: OutlineNode, radius_step: float = 1.6, spread: float = 1.6) -> None:
-    root.angle = math.pi / 2
-    root.radius = 0.0
-    first_level = root.children
-    if not first_level:
-        return
+@functools.lru_cache(maxsize=None)
+def _rgba(color: str) -> tuple[float, float, float, float]:
+    """Convert a color to RGBA once so matplotlib does not reparse it per artist."""
+    from matplotlib.colors import to_rgba
 
-    branch_count = len(first_level)
-    for idx, child in enumerate(first_level):
-        angle = math.pi / 2 - (math.tau * idx / branch_count)
-        _assign_branch(child, depth=1, angle=angle, radius_step=radius_step, spread=spread)
+    return to_rgba(color)
 
 
-def _assign_branch(
-    node: OutlineNode,
-    *,
-    depth: int,
-    angle: float,
-    radius_step: float,
-    spread: float,
+def draw_mind_map(
+    root: DrawingOutlineNode, output_path: Path, dpi: int = 300, rasterize: bool = False
 ) -> None:
-    node.depth = depth
-    node.angle = angle
-    node.radius = depth * radius_step
-
-    child_count = len(node.children)
-    if child_count == 0:
-        return
-
-    local_spread = spread / (depth + 0.5)
-    if child_count == 1:
-        child_angles = [angle]
-    else:
-        step = local_spread / (child_count - 1)
-        child_angles = [angle - (local_spread / 2) + step * idx for idx in range(child_count)]
-
-    for idx, child in enumerate(node.children):
-        _assign_branch(
-            child,
-            depth=depth + 1,
-            angle=child_angles[idx],
-            radius_step=radius_step,
-            spread=spread,
-        )
-
-
-def iter_nodes(root: OutlineNode) -> Iterable[OutlineNode]:
-    yield root
-    for child in root.children:
-        yield from iter_nodes(child)
-
-
-def draw_mind_map(root: OutlineNode, output_path: Path, dpi: int = 300) -> None:
-    fig: Any = Figure(figsize=(11, 11))
-    FigureCanvasAgg(fig)
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    fig: Any = _FIG_CACHE.get(FIGSIZE)
+    if fig is None:
+        fig = _FIG_CACHE[FIGSIZE] = Figure(figsize=FIGSIZE)
+        FigureCanvasAgg(fig)
+    fig.clf()
     ax: Any = fig.add_subplot(111)
     ax.axis("off")
 
-    connector_color = "#94a3b8"
-    for node in iter_nodes(root):
-        if node.parent is None:
+    layout = get_layout(root)
+    coords, parents, depths = layout.coords, layout.parents, layout.depths
+
+    segments = np.stack([coords[parents[1:]], coords[1:]], axis=1)
+    # Vector output is smaller and stays sharp on zoom; rasterizing only helps viewers
+    # that struggle with very dense vector maps, so it is opt-in.
+    connectors = LineCollection(
+        segments,  # type: ignore[arg-type]
+        colors=_rgba(CONNECTOR_COLOR),
+        linewidths=1.15,
+        zorder=1,
+        rasterized=rasterize,
+    )
+    ax.add_collection(connectors)
+
+    buckets = np.minimum(depths, 3)
+    for bucket, (marker_size, _, color, _, _, alpha) in enumerate(_DEPTH_STYLE):
+        idx = np.flatnonzero(buckets == bucket)
+        if idx.size == 0:
             continue
-        x0, y0 = node.parent.coords
-        x1, y1 = node.coords
-        ax.plot([x0, x1], [y0, y1], color=connector_color, linewidth=1.15, zorder=1)
+        ax.scatter(
+            coords[idx, 0],
+            coords[idx, 1],
+            s=marker_size,
+            color=_rgba(color),
+            alpha=alpha,
+            zorder=2,
+            rasterized=rasterize,
+        )
 
+    culled = _culled_labels(root)
     for node in iter_nodes(root):
-        _draw_node(ax, node)
+        if not culled[node._idx]:
+            _draw_node(ax, node)
 
     fig.tight_layout()
     fig.savefig(output_path, dpi=dpi, bbox_inches="tight", transparent=False)
 
 
-def export_markdown(root: OutlineNode, output_path: Path) -> None:
-    lines = [f"# {root.label}", ""]
-
-    def _walk(node: OutlineNode, depth: int, bucket: list[str]) -> None:
-        indent = "    " * depth
-        bucket.append(f"{indent}- {node.label}")
-        for child in node.children:
-            _walk(child, depth + 1, bucket)
+def export_markdown(root: TextOutlineNode, output_path: Path) -> None:
+    nodes = iter_nodes(root)
+    max_depth = max(node.depth for node in nodes)
+    indents = ["    " * depth for depth in range(max_depth)]
+    # Heading, blank line, one bullet per non-root node, and the trailing newline.
+    lines = [""] * (len(nodes) + 2)
+    lines[0] = f"# {root.label}"
+    for pos, node in enumerate(nodes[1:], start=2):
+        lines[pos] = f"{indents[node.depth - 1]}- {node.label}"
 
-    for child in root.children:
-        _walk(child, 0, lines)
+    _write_lines(output_path, lines)
 
-    output_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
-
-def export_ascii(root: OutlineNode, output_path: Path) -> None:
-    lines = [root.label]
+def export_ascii(root: TextOutlineNode, output_path: Path) -> None:
+    nodes = iter_nodes(root)
     children = root.children
+    # One line per node, plus a "│" under the root and a "│"/blank pair between
+    # top-level branches, plus the trailing newline.
+    separators = 2 * len(children) - 1 if children else 0
+    lines = [""] * (len(nodes) + separators + 1)
+    lines[0] = root.label
+    pos = 1
     if children:
-        lines.append("│")
+        lines[pos] = "│"
+        pos += 1
 
     for idx, child in enumerate(children):
-        _walk_ascii(child, prefix="", is_last=idx == len(children) - 1, bucket=lines)
+        pos = _walk_ascii(child, is_last=idx == len(children) - 1, bucket=lines, pos=pos)
         if idx < len(children) - 1:
-            lines.append("│")
-            lines.append("")
+            lines[pos] = "│"
+            pos += 2
 
-    output_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    _write_lines(output_path, lines)
 
 
-def _walk_ascii(node: OutlineNode, *, prefix: str, is_last: bool, bucket: list[str]) -> None:
-    connector = "└──" if is_last else "├──"
-    bucket.append(f"{prefix}{connector} {node.label}")
-    if not node.children:
-        return
+def _write_lines(output_path: Path, lines: list[str]) -> None:
+    """Join ``lines`` and write them as UTF-8; end with ``""`` for a trailing newline."""
+    output_path.write_bytes("\n".join(lines).encode("utf-8"))
+
 
-    child_prefix = f"{prefix}{'    ' if is_last else '│   '}"
-    for idx, child in enumerate(node.children):
-        _walk_ascii(child, prefix=child_prefix, is_last=idx == len(node.children) - 1, bucket=bucket)
+def _walk_ascii(node: TextOutlineNode, *, is_last: bool, bucket: list[str], pos: int) -> int:
+    """Fill ``bucket`` from index ``pos`` and return the index after the last line."""
+    # Each prefix segment is pushed once per level and only joined when a line is emitted.
+    prefix_stack: list[str] = []
+    stack = [(node, 0, is_last)]
+    while stack:
+        current, level, last = stack.pop()
+        del prefix_stack[level:]
+        connector = "└──" if last else "├──"
+        bucket[pos] = f"{''.join(prefix_stack)}{connector} {current.label}"
+        pos += 1
+        if not current.children:
+            continue
+
+        prefix_stack.append("    " if last else "│   ")
+        final = len(current.children) - 1
+        for idx in range(final, -1, -1):
+            stack.append((current.children[idx], level + 1, idx == final))
+    return pos
+
+
+def _culled_labels(root: DrawingOutlineNode) -> Any:
+    """Flag labels that a strictly shallower label would almost entirely cover.
+
+    Label boxes are estimated in inches from the font size and label length,
+    assuming the axes stretch the node cloud across the figure. Labels at the
+    same depth never hide each other.
+    """
+    import numpy as np
+
+    nodes = iter_nodes(root)
+    count = len(nodes)
+    culled = np.zeros(count, dtype=bool)
+    if count < 2:
+        return culled
+
+    layout = get_layout(root)
+    coords, depths = layout.coords, layout.depths
+    span = coords.max(axis=0) - coords.min(axis=0)
+    inches_per_unit = np.asarray(FIGSIZE) / np.where(span > 0, span, 1.0)
+    cos_a = np.fromiter((node.cos_a for node in nodes), dtype=np.float64, count=count)
+    sin_a = np.fromiter((node.sin_a for node in nodes), dtype=np.float64, count=count)
+    lengths = np.fromiter((len(node.label) for node in nodes), dtype=np.float64, count=count)
+
+    font_sizes = np.take([style[1] for style in _DEPTH_STYLE], np.minimum(depths, 3))
+    widths = font_sizes * lengths * 0.6 / 72
+    heights = font_sizes * 1.2 / 72
+    offsets = np.where(depths == 0, 0.0, 0.3 + 0.08 * depths)
+    centers = (coords + offsets[:, None] * np.column_stack([cos_a, sin_a])) * inches_per_unit
+    # Non-root labels are anchored on the side facing away from the root.
+    centers[:, 0] += np.where(depths == 0, 0.0, np.where(cos_a >= 0, 0.5, -0.5)) * widths
+
+    lefts = centers[:, 0] - widths / 2
+    rights = centers[:, 0] + widths / 2
+    bottoms = centers[:, 1] - heights / 2
+    tops = centers[:, 1] + heights / 2
+
+    # With LABEL_OVERLAP_LIMIT above one half, a covered label's center must lie inside
+    # the covering label's box, so each label only needs to check the centers within
+    # its own x-extent. Sorting by x lets searchsorted find those candidates.
+    by_x = np.argsort(centers[:, 0], kind="stable")
+    sorted_x = centers[by_x, 0]
+    starts = np.searchsorted(sorted_x, lefts, side="right")
+    stops = np.searchsorted(sorted_x, rights, side="left")
+
+    # Shallower labels go first, so a label's own visibility is settled before it hides others.
+    for i in np.lexsort((np.arange(count), depths)).tolist():
+        if culled[i] or stops[i] - starts[i] < 2:
+            continue
+        j = by_x[starts[i] : stops[i]]
+        inside = (centers[j, 1] > bottoms[i]) & (centers[j, 1] < tops[i])
+        j = j[inside & (depths[j] > depths[i]) & ~culled[j]]
+        if j.size == 0:
+            continue
+        overlap_w = np.minimum(rights[j], rights[i]) - np.maximum(lefts[j], lefts[i])
+        overlap_h = np.minimum(tops[j], tops[i]) - np.maximum(bottoms[j], bottoms[i])
+        covered = overlap_w * overlap_h > LABEL_OVERLAP_LIMIT * widths[j] * heights[j]
+        culled[j[covered]] = True
+    return culled
 
 
-def _draw_node(ax: Any, node: OutlineNode) -> None:
+def _draw_node(ax: Any, node: DrawingOutlineNode) -> None:
+    _, font_size, color, text_color, weight, _ = _DEPTH_STYLE[min(node.depth, 3)]
     x, y = node.coords
     if node.depth == 0:
-        ax.scatter([x], [y], s=1400, color="#0b3954", zorder=2)  # type: ignore[attr-defined]
         ax.text(
             x,
             y,
             node.label,
-            color="#ffffff",
-            fontsize=18,
-            weight="bold",
+            color=_rgba(text_color),
+            fontsize=font_size,
+            weight=weight,
             ha="center",
             va="center",
             zorder=3,
         )
         return
 
-    if node.depth == 1:
-        color = "#087e8b"
-        marker_size = 220
-        font_size = 13
-    elif node.depth == 2:
-        color = "#1f487e"
-        marker_size = 90
-        font_size = 11
-    else:
-        color = "#475569"
-        marker_size = 60
-        font_size = 10
-
-    ax.scatter([x], [y], s=marker_size, color=color, alpha=0.95, zorder=2)  # type: ignore[attr-defined]
     offset = 0.3 + 0.08 * node.depth
-    text_x = x + offset * math.cos(node.angle)
-    text_y = y + offset * math.sin(node.angle)
-    ha = "left" if math.cos(node.angle) >= 0 else "right"
-    weight = "bold" if node.depth <= 2 else "normal"
+    text_x = x + offset * node.cos_a
+    text_y = y + offset * node.sin_a
+    ha = "left" if node.cos_a >= 0 else "right"
     ax.text(
         text_x,
         text_y,
         node.label,
-        color=color,
+        color=_rgba(text_color or color),
         fontsize=font_size,
         weight=weight,
         ha=ha,
@@ -248,6 +307,23 @@ def _draw_node(ax: Any, node: OutlineNode) -> None:
     )
 
 
+def render(
+    root: TextOutlineNode, fmt: str, output_path: Path, dpi: int = 300, rasterize: bool = False
+) -> None:
+    """Export ``root`` as ``fmt`` ("pdf", "markdown", or "ascii") to ``output_path``."""
+    if fmt == "pdf":
+        if not isinstance(root, DrawingOutlineNode):
+            raise TypeError("PDF export needs a tree built with DrawingOutlineNode")
+        layout_tree(root)
+        draw_mind_map(root, output_path, dpi=dpi, rasterize=rasterize)
+    elif fmt == "markdown":
+        export_markdown(root, output_path)
+    elif fmt == "ascii":
+        export_ascii(root, output_path)
+    else:
+        raise ValueError(f"Unsupported format: {fmt!r}")
+
+
 def ensure_output_dir() -> None:
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -255,8 +331,7 @@ def ensure_output_dir() -> None:
 def main() -> None:
     args = parse_args()
     ensure_output_dir()
-    outline = load_outline()
-    root = build_tree(outline)
+    root = load_tree(DrawingOutlineNode if args.format == "pdf" else TextOutlineNode)
     output_path = args.output
     if output_path is None:
         if args.format == "pdf":
@@ -267,13 +342,7 @@ def main() -> None:
             output_path = DEFAULT_ASCII
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if args.format == "pdf":
-        layout_tree(root)
-        draw_mind_map(root, output_path, dpi=args.dpi)
-    elif args.format == "markdown":
-        export_markdown(root, output_path)
-    else:
-        export_ascii(root, output_path)
+    render(root, args.format, output_path, dpi=args.dpi, rasterize=args.rasterize)
 
     try:
         rel_path = output_path.relative_to(ROOT)
@@ -0,0 +1,295 @@
+"""Outline tree model, loading, and radial layout shared by every export format."""
+
+from __future__ import annotations
+
+import functools
+import json
+import math
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar, cast, overload
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# NumPy is only needed for the radial layout, so it is imported inside the layout
+# helpers; text-only exports never pay for it.
+
+
+def _child_list_factory() -> list["TextOutlineNode"]:
+    return []
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PATH = ROOT / "data" / "outline.json"
+
+# Outlines at least this large use the Numba layout kernel when Numba is installed.
+NUMBA_MIN_NODES = 5000
+
+
+@dataclass
+class TextOutlineNode:
+    """Tree node with only what the markdown and ASCII exports need."""
+
+    title: str
+    code: str | None = None
+    label: str = ""
+    children: list["TextOutlineNode"] = field(default_factory=_child_list_factory)
+    parent: TextOutlineNode | None = None
+    depth: int = 0
+
+    # Root-only state: build_tree sets it on the root and every other node reads the
+    # class default. It is declared for type checkers only so the dataclass does not
+    # turn it into a per-node field.
+    if TYPE_CHECKING:
+        _preorder: list[TextOutlineNode] | None = field(default=None, init=False)
+    else:
+        _preorder = None
+
+
+@dataclass
+class DrawingOutlineNode(TextOutlineNode):
+    """Tree node that also keeps the radial layout used by the PDF mind map."""
+
+    angle: float = 0.0
+    radius: float = 0.0
+    cos_a: float = 0.0
+    sin_a: float = 0.0
+    _idx: int = field(default=0, init=False, repr=False, compare=False)
+
+    # Root-only state set by layout_tree; see TextOutlineNode._preorder.
+    if TYPE_CHECKING:
+        _layout: TreeLayout | None = field(default=None, init=False)
+    else:
+        _layout = None
+
+    @property
+    def coords(self) -> tuple[float, float]:
+        return (self.radius * self.cos_a, self.radius * self.sin_a)
+
+
+@dataclass
+class TreeLayout:
+    """Flat layout arrays for a whole tree, indexed by each node's preorder position."""
+
+    coords: np.ndarray
+    parents: np.ndarray
+    depths: np.ndarray
+
+
+NodeT = TypeVar("NodeT", bound=TextOutlineNode)
+
+
+@functools.lru_cache(maxsize=1)
+def load_outline(path: Path, mtime_ns: int) -> dict[str, Any]:
+    """Parse the outline JSON, cached per ``(path, mtime_ns)``.
+
+    ``mtime_ns`` is the file's ``st_mtime_ns`` so edits to the outline invalidate the
+    cache. The returned dict is shared between callers and must not be mutated.
+    """
+    with path.open("r", encoding="utf-8") as source:
+        return json.load(source)
+
+
+def _label(title: str, code: str | None) -> str:
+    return f"{code} {title}" if code else title
+
+
+@overload
+def build_tree(raw: dict[str, Any]) -> DrawingOutlineNode: ...
+
+
+@overload
+def build_tree(raw: dict[str, Any], node_cls: type[NodeT]) -> NodeT: ...
+
+
+def build_tree(raw: dict[str, Any], node_cls: type[TextOutlineNode] = DrawingOutlineNode) -> TextOutlineNode:
+    """Build a tree of ``node_cls`` nodes from the outline dict.
+
+    Text exports pass ``TextOutlineNode`` to skip the layout fields.
+    """
+    title, code = raw["title"], raw.get("code")
+    root = node_cls(title=title, code=code, label=_label(title, code))
+    preorder = [root]
+    stack = [(root, child) for child in reversed(raw.get("children", []))]
+    while stack:
+        parent, data = stack.pop()
+        title, code = data["title"], data.get("code")
+        node = node_cls(
+            title=title, code=code, label=_label(title, code), parent=parent, depth=parent.depth + 1
+        )
+        parent.children.append(node)
+        preorder.append(node)
+        stack.extend((node, child) for child in reversed(data.get("children", [])))
+    root._preorder = preorder
+    return root
+
+
+@functools.lru_cache(maxsize=2)
+def _cached_build(mtime_ns: int, node_cls: type[TextOutlineNode]) -> TextOutlineNode:
+    return build_tree(load_outline(DATA_PATH, mtime_ns), node_cls)
+
+
+@overload
+def load_tree() -> DrawingOutlineNode: ...
+
+
+@overload
+def load_tree(node_cls: type[NodeT]) -> NodeT: ...
+
+
+def load_tree(node_cls: type[TextOutlineNode] = DrawingOutlineNode) -> TextOutlineNode:
+    """Return the outline tree, reparsing only when ``DATA_PATH`` changes."""
+    # Classes are hashable, but mypy infers unhashable from the dataclass's __hash__ = None.
+    return _cached_build(DATA_PATH.stat().st_mtime_ns, cast(Hashable, node_cls))
+
+
+def get_layout(root: DrawingOutlineNode) -> TreeLayout:
+    """Return the flat layout arrays recorded on ``root`` by ``layout_tree``."""
+    if root._layout is None:
+        raise ValueError("layout_tree() has not been run on this tree")
+    return root._layout
+
+
+def iter_nodes(root: NodeT) -> list[NodeT]:
+    """Return ``root`` and its descendants in preorder.
+
+    Roots built by ``build_tree`` return their recorded list; any other subtree
+    is walked on demand.
+    """
+    if root._preorder is not None:
+        return cast("list[NodeT]", root._preorder)
+    nodes: list[NodeT] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(cast("list[NodeT]", node.children[::-1]))
+    return nodes
+
+
+def flatten_tree(root: DrawingOutlineNode) -> tuple[list[DrawingOutlineNode], np.ndarray, np.ndarray]:
+    """Tag each node with its preorder index.
+
+    Returns the preorder node list together with parallel ``parents`` and
+    ``depths`` arrays; the root's parent index is ``-1``.
+    """
+    import numpy as np
+
+    nodes = iter_nodes(root)
+    parents = np.empty(len(nodes), dtype=np.int32)
+    for idx, node in enumerate(nodes):
+        node._idx = idx
+        parents[idx] = -1 if node.parent is None else cast(DrawingOutlineNode, node.parent)._idx
+    depths = np.fromiter((node.depth for node in nodes), dtype=np.int32, count=len(nodes))
+    return nodes, parents, depths
+
+
+def _assign_angles(
+    child_offsets: np.ndarray,
+    child_index: np.ndarray,
+    depths: np.ndarray,
+    out_angle: np.ndarray,
+    spread: float,
+) -> None:
+    """Fill ``out_angle`` for a preorder tree stored as CSR child lists."""
+    for parent in range(depths.shape[0]):
+        start = child_offsets[parent]
+        child_count = child_offsets[parent + 1] - start
+        if child_count == 0:
+            continue
+        if parent == 0:
+            for rank in range(child_count):
+                out_angle[child_index[start + rank]] = math.pi / 2 - (math.tau * rank / child_count)
+            continue
+
+        angle = out_angle[parent]
+        if child_count == 1:
+            out_angle[child_index[start]] = angle
+            continue
+        local_spread = spread / (depths[parent] + 0.5)
+        step = local_spread / (child_count - 1)
+        for rank in range(child_count):
+            out_angle[child_index[start + rank]] = angle - (local_spread / 2) + step * rank
+
+
+@functools.lru_cache(maxsize=1)
+def _numba_assign_angles() -> Any:
+    """Return a JIT-compiled ``_assign_angles``, or ``None`` without Numba."""
+    try:
+        import numba  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    return numba.njit(cache=True)(_assign_angles)
+
+
+def _angles_numba(kernel: Any, parents: np.ndarray, depths: np.ndarray, spread: float) -> np.ndarray:
+    import numpy as np
+
+    count = len(parents)
+    child_index = (np.argsort(parents[1:], kind="stable") + 1).astype(np.int32)
+    child_offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(parents[1:], minlength=count), out=child_offsets[1:])
+    angles = np.empty(count, dtype=np.float64)
+    angles[0] = math.pi / 2
+    kernel(child_offsets, child_index, depths, angles, spread)
+    return angles
+
+
+def _angles_vectorized(parents: np.ndarray, depths: np.ndarray, spread: float) -> np.ndarray:
+    import numpy as np
+
+    count = len(parents)
+
+    # Position of each node among its siblings, and how many siblings it has.
+    by_parent = np.argsort(parents, kind="stable")
+    first_sibling = np.searchsorted(parents[by_parent], parents[by_parent], side="left")
+    ranks = np.empty(count, dtype=np.int64)
+    ranks[by_parent] = np.arange(count) - first_sibling
+    child_counts = np.bincount(parents[1:], minlength=count)
+    sibling_counts = np.ones(count, dtype=np.int64)
+    sibling_counts[1:] = child_counts[parents[1:]]
+
+    angles = np.empty(count, dtype=np.float64)
+    angles[0] = math.pi / 2
+
+    level = depths == 1
+    angles[level] = math.pi / 2 - math.tau * ranks[level] / sibling_counts[level]
+    for depth in range(2, int(depths.max(initial=0)) + 1):
+        level = depths == depth
+        local_spread = spread / (depth - 0.5)
+        siblings = sibling_counts[level]
+        step = local_spread / np.maximum(siblings - 1, 1)
+        offsets = np.where(siblings == 1, 0.0, step * ranks[level] - local_spread / 2)
+        angles[level] = angles[parents[level]] + offsets
+    return angles
+
+
+def layout_tree(root: DrawingOutlineNode, radius_step: float = 1.6, spread: float = 1.6) -> None:
+    import numpy as np
+
+    nodes, parents, depths = flatten_tree(root)
+    count = len(nodes)
+
+    kernel = _numba_assign_angles() if count >= NUMBA_MIN_NODES else None
+    if kernel is not None:
+        angles = _angles_numba(kernel, parents, depths, spread)
+    else:
+        angles = _angles_vectorized(parents, depths, spread)
+    radii = depths * radius_step
+
+    cosines = np.cos(angles)
+    sines = np.sin(angles)
+    coords = np.empty((count, 2), dtype=np.float64)
+    np.multiply(radii, cosines, out=coords[:, 0])
+    np.multiply(radii, sines, out=coords[:, 1])
+
+    root._layout = TreeLayout(coords=coords, parents=parents, depths=depths)
+    for node, angle, radius, cos_a, sin_a in zip(
+        nodes, angles.tolist(), radii.tolist(), cosines.tolist(), sines.tolist()
+    ):
+        node.angle = angle
+        node.radius = radius
+        node.cos_a = cos_a
+        node.sin_a = sin_a